@@ -28,8 +28,8 @@ async def main():
 
     async with SessionLocal() as session:
         # Seed a couple of users if table is empty
-        exists_payload = await session.execute(select(User.id).limit(1))
-        if not exists_payload:
+        exists = (await session.execute(select(User.id).limit(1), no_cache=True)).first() is not None
+        if not exists:
             session.add_all([
                 User(username="alice", email="a@example.com", is_active=True),
                 User(username="bob", email="b@example.com", is_active=False),
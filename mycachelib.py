@@ -1,31 +1,382 @@
 # mycachelib.py
 import asyncio
 import contextlib
-import time
-import hashlib
+import datetime
+import functools
+import logging
 import pickle
-from typing import Any, Optional
+import struct
+import time
+import weakref
+from decimal import Decimal
+from typing import Any, Iterable, Optional, Union
+from uuid import UUID
 
+import lz4.block
+import msgpack
+from cachetools import TTLCache
+from blake3 import blake3
 import redis.asyncio as aioredis
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import Executable, Select
-from sqlalchemy import event
+from sqlalchemy import TextClause, event
 from sqlalchemy.inspection import inspect as sa_inspect
+from sqlalchemy.orm.context import FromStatement
+from sqlalchemy.sql.util import find_tables
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+# Compiled SQL text keyed by SQLAlchemy's structural cache key, so equivalent statements
+# rebuilt on every request share a single compilation (FIFO-bounded)
+_SQL_TEXT_BY_CACHE_KEY: dict[tuple, str] = {}
+_SQL_TEXT_BY_CACHE_KEY_MAXSIZE = 1024
+# Fallback for statements without a cache key: memoized per statement object and
+# evicted when the statement is garbage collected
+_SQL_TEXT_CACHE: dict[int, str] = {}
+
+
+def _sql_text(statement: Executable) -> tuple[str, tuple]:
+    """Return the compiled SQL text of a statement plus its literal bind values.
+    `str(statement)` renders literals as placeholders, so the values are needed to
+    tell apart e.g. `User.id == 2` and `User.id == 3`.
+    """
+    generate_cache_key = getattr(statement, "_generate_cache_key", None)
+    sa_cache_key = generate_cache_key() if generate_cache_key is not None else None
+    if sa_cache_key is not None:
+        sql_text = _SQL_TEXT_BY_CACHE_KEY.get(sa_cache_key.key)
+        if sql_text is None:
+            if len(_SQL_TEXT_BY_CACHE_KEY) >= _SQL_TEXT_BY_CACHE_KEY_MAXSIZE:
+                _SQL_TEXT_BY_CACHE_KEY.pop(next(iter(_SQL_TEXT_BY_CACHE_KEY)))
+            sql_text = _SQL_TEXT_BY_CACHE_KEY[sa_cache_key.key] = str(statement)
+        return sql_text, tuple(bind.effective_value for bind in sa_cache_key.bindparams)
+
+    statement_id = id(statement)
+    sql_text = _SQL_TEXT_CACHE.get(statement_id)
+    if sql_text is None:
+        sql_text = str(statement)
+        try:
+            weakref.finalize(statement, _SQL_TEXT_CACHE.pop, statement_id, None)
+        except TypeError:
+            # Statements that can't be weakly referenced are simply not memoized
+            return sql_text, ()
+        _SQL_TEXT_CACHE[statement_id] = sql_text
+    return sql_text, ()
+
+
+_INT64 = struct.Struct("<q")
+_FLOAT64 = struct.Struct("<d")
+
+
+def _hash_bytes(hasher: blake3, tag: bytes, data: bytes) -> None:
+    hasher.update(tag)
+    hasher.update(_INT64.pack(len(data)))
+    hasher.update(data)
 
 
-def make_cache_key(statement: Executable, params: dict, prefix: str = "sqlcache") -> str:
+def _hash_value(hasher: blake3, value: Any) -> None:
+    """Feed a param value to the hasher, type-tagged so that e.g. 1 and "1" hash differently."""
+    value_type = type(value)
+    if value is None:
+        hasher.update(b"N")
+    elif value_type is bool:
+        hasher.update(b"T" if value else b"F")
+    elif value_type is int and -(2**63) <= value < 2**63:
+        hasher.update(b"i")
+        hasher.update(_INT64.pack(value))
+    elif value_type is float:
+        hasher.update(b"f")
+        hasher.update(_FLOAT64.pack(value))
+    elif value_type is str:
+        _hash_bytes(hasher, b"s", value.encode("utf-8"))
+    elif value_type is bytes:
+        _hash_bytes(hasher, b"b", value)
+    else:
+        _hash_bytes(hasher, b"r", repr(value).encode("utf-8"))
+
+
+@functools.lru_cache(maxsize=None)
+def _key_namespace(prefix: str) -> bytes:
+    """Short binary namespace standing in for the text prefix on cache keys:
+    a NUL marker byte followed by two bytes of the prefix's hash.
+    """
+    return b"\x00" + blake3(prefix.encode("utf-8")).digest()[:2]
+
+
+def _key_pattern(prefix: str) -> bytes:
+    """SCAN pattern matching every cache key in a prefix's namespace."""
+    escaped = b"".join(b"\\" + bytes([c]) if c in b"*?[]\\" else bytes([c]) for c in _key_namespace(prefix))
+    return escaped + b"*"
+
+
+def make_cache_key(statement: Executable, params: dict, prefix: str = "sqlcache") -> bytes:
     """Create a stable cache key from the SQL string plus params.
     Avoid recompiling with literal binds to keep the key stable across calls.
+    Keys are 15 raw bytes (namespace + 12-byte digest) to keep Redis keyspace memory low.
+    """
+    sql_text, literals = _sql_text(statement)
+    # Keys only need low collision probability, so a truncated fast hash is plenty
+    hasher = blake3()
+    _hash_bytes(hasher, b"q", sql_text.encode("utf-8"))
+    for value in literals:
+        _hash_value(hasher, value)
+    if isinstance(params, dict):
+        # Sorted so the same values passed in a different order share a key
+        hasher.update(b"p")
+        for name in sorted(params):
+            _hash_bytes(hasher, b"k", name.encode("utf-8"))
+            _hash_value(hasher, params[name])
+    else:
+        _hash_value(hasher, params)
+    return _key_namespace(prefix) + hasher.digest()[:12]
+
+
+# Column attribute keys per mapped class
+_COLUMN_KEYS: dict[type, tuple[str, ...]] = {}
+
+
+def _column_keys(cls: type) -> tuple[str, ...]:
+    keys = _COLUMN_KEYS.get(cls)
+    if keys is None:
+        keys = _COLUMN_KEYS[cls] = tuple(attr.key for attr in sa_inspect(cls).column_attrs)
+    return keys
+
+
+def _is_mapped_entity(description: dict) -> bool:
+    entity_type = description["type"]
+    return isinstance(entity_type, type) and hasattr(entity_type, "__mapper__")
+
+
+def _single_entity(statement: Executable) -> Optional[dict]:
+    """The column description of the statement's only selected item, if that is an ORM entity."""
+    descriptions = getattr(statement, "column_descriptions", None)
+    if not descriptions or len(descriptions) != 1 or not _is_mapped_entity(descriptions[0]):
+        return None
+    return descriptions[0]
+
+
+def _entity_positions(statement: Executable) -> list[tuple[int, tuple[str, ...]]]:
+    """(result column index, column keys) of every ORM entity among the selected items."""
+    descriptions = getattr(statement, "column_descriptions", None) or ()
+    return [
+        (index, _column_keys(description["type"]))
+        for index, description in enumerate(descriptions)
+        if _is_mapped_entity(description)
+    ]
+
+
+def _entity_column_select(statement: Select, entity: dict) -> Select:
+    """Rewrite a single-entity select to select the entity's columns directly, so rows
+    come back without building ORM instances.
     """
-    sql_text = str(statement)
-    raw = f"{sql_text}|{repr(params)}"
-    digest = hashlib.sha256(raw.encode("utf-8")).hexdigest()
-    return f"{prefix}:{digest}"
+    # "expr" is the entity as selected, so aliased entities keep their alias
+    columns = [getattr(entity["expr"], key).label(key) for key in _column_keys(entity["type"])]
+    return statement.with_only_columns(*columns, maintain_column_froms=True)
 
 
-class CachedAsyncSession(AsyncSession):
+def _rewrite_entity_select(statement: Executable) -> tuple[Executable, Optional[dict]]:
+    """The statement to key and execute a cacheable SELECT with, plus the entity description
+    if it is a single-entity select rewritten by `_entity_column_select` (else None).
+    The cache key must come from the rewritten statement: loader options such as load_only()
+    change how the original compiles, so it can match an unrelated plain column select.
     """
-    AsyncSession subclass that transparently caches SELECT queries in Redis using pickle.
+    entity = _single_entity(statement)
+    if entity is None or not isinstance(statement, Select):
+        # e.g. from_statement(), which can't be rewritten
+        return statement, None
+    return _entity_column_select(statement, entity), entity
+
+
+# Tag for cached SELECTs whose source tables can't be determined (e.g. raw text);
+# every invalidation clears it along with the written tables' tags
+_UNTAGGED = "*"
+
+
+def _tag_key(prefix: str, table: str) -> str:
+    """Redis sorted set of the cache keys of queries that read from `table`, each scored
+    by its expiry time so members outliving their cache entry can be pruned.
+    """
+    return f"{prefix}:tag:{table}"
+
+
+def statement_tables(statement: Executable) -> set[str]:
+    """Names of the tables a statement reads from (empty if they can't be determined)."""
+    return {table.fullname for table in find_tables(statement)}
+
+
+# Whether each Redis client's server accepts EXPIRE's NX/GT options (Redis 7+), probed once
+_EXPIRE_OPTIONS_SUPPORT: "weakref.WeakKeyDictionary[aioredis.Redis, bool]" = weakref.WeakKeyDictionary()
+
+
+async def _expire_options_supported(redis_client: aioredis.Redis, cache_prefix: str) -> bool:
+    supported = _EXPIRE_OPTIONS_SUPPORT.get(redis_client)
+    if supported is None:
+        try:
+            # Servers before 7.0 reject the extra argument; on 7+ this is a no-op as the key doesn't exist
+            await redis_client.expire(f"{cache_prefix}:expire-probe", 1, nx=True)
+            supported = True
+        except aioredis.ResponseError:
+            supported = False
+        _EXPIRE_OPTIONS_SUPPORT[redis_client] = supported
+    return supported
+
+
+async def _unlink_matching(redis_client: aioredis.Redis, pattern: Union[str, bytes], batch_size: int = 500):
+    """UNLINK all keys matching `pattern`, walking the keyspace with SCAN instead of KEYS."""
+    batch = []
+    async for key in redis_client.scan_iter(match=pattern, count=batch_size):
+        batch.append(key)
+        if len(batch) >= batch_size:
+            await redis_client.unlink(*batch)
+            batch.clear()
+    if batch:
+        await redis_client.unlink(*batch)
+
+
+async def _unlink_tagged(redis_client: aioredis.Redis, tag_key: str, batch_size: int = 500):
+    """UNLINK the cache keys tracked by a tag, walking it with ZSCAN in batches."""
+
+    async def unlink(members):
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.unlink(*members)
+        # ZREM rather than dropping the tag so keys tagged in the meantime stay tracked
+        pipe.zrem(tag_key, *members)
+        await pipe.execute()
+
+    batch = []
+    async for member, _expires_at in redis_client.zscan_iter(tag_key, count=batch_size):
+        batch.append(member)
+        if len(batch) >= batch_size:
+            await unlink(batch)
+            batch = []
+    if batch:
+        await unlink(batch)
+
+
+async def clear_prefix(redis_client: aioredis.Redis, cache_prefix: str = "sqlcache"):
+    """Drop every cached query and tag set under `cache_prefix`."""
+    await _unlink_matching(redis_client, _key_pattern(cache_prefix))
+    await _unlink_matching(redis_client, _tag_key(cache_prefix, "*"))
+
+
+async def invalidate_tables(redis_client: aioredis.Redis, tables: Iterable[str], cache_prefix: str = "sqlcache"):
+    """Drop cached queries that read from any of `tables` (and all untagged queries)."""
+    await asyncio.gather(
+        *(_unlink_tagged(redis_client, _tag_key(cache_prefix, table)) for table in {*tables, _UNTAGGED})
+    )
+
+
+def _leading_keyword(sql: str) -> str:
+    """First six characters of a SQL string, lowercased; enough to spot select/insert/update/delete."""
+    return sql.lstrip()[:6].lower()
+
+
+def _no_cache_requested(statement: Executable, kwargs: dict) -> bool:
+    """Whether `no_cache=True` was set as an execution option on the statement or the call."""
+    if (kwargs.get("execution_options") or {}).get("no_cache"):
+        return True
+    return bool(statement.get_execution_options().get("no_cache"))
+
+
+# Rough serialized size of one result row, used to decide when to encode off the event loop
+_ESTIMATED_ROW_BYTES = 64
+
+# One-byte format tag prepended to every cached blob.
+_PICKLE_TAG = b"\x00"
+_MSGPACK_TAG = b"\x01"
+_LZ4_MSGPACK_TAG = b"\x02"
+_LZ4_PICKLE_TAG = b"\x03"
+_COMPRESSED_TAGS = {_MSGPACK_TAG: _LZ4_MSGPACK_TAG, _PICKLE_TAG: _LZ4_PICKLE_TAG}
+_DECOMPRESSED_TAGS = {compressed: plain for plain, compressed in _COMPRESSED_TAGS.items()}
+# Encoded payloads larger than this many bytes are LZ4-compressed
+_COMPRESS_THRESHOLD = 1024
+
+
+# msgpack extension type codes for values that must round-trip with their Python type
+_EXT_DECIMAL = 1
+_EXT_UUID = 2
+_EXT_DATETIME = 3
+_EXT_DATE = 4
+_EXT_TIME = 5
+
+_EXT_DECODERS = {
+    _EXT_DECIMAL: lambda data: Decimal(data.decode("ascii")),
+    _EXT_UUID: lambda data: UUID(bytes=data),
+    _EXT_DATETIME: lambda data: datetime.datetime.fromisoformat(data.decode("ascii")),
+    _EXT_DATE: lambda data: datetime.date.fromisoformat(data.decode("ascii")),
+    _EXT_TIME: lambda data: datetime.time.fromisoformat(data.decode("ascii")),
+}
+
+
+def _msgpack_default(obj: Any) -> Any:
+    """Encode values msgpack can't handle natively as extension types.
+    Timezone-aware datetimes never get here; they use the msgpack timestamp extension.
+    """
+    if isinstance(obj, Decimal):
+        return msgpack.ExtType(_EXT_DECIMAL, str(obj).encode("ascii"))
+    if isinstance(obj, UUID):
+        return msgpack.ExtType(_EXT_UUID, obj.bytes)
+    # datetime subclasses date, so it must be checked first
+    if isinstance(obj, datetime.datetime):
+        return msgpack.ExtType(_EXT_DATETIME, obj.isoformat().encode("ascii"))
+    if isinstance(obj, datetime.date):
+        return msgpack.ExtType(_EXT_DATE, obj.isoformat().encode("ascii"))
+    if isinstance(obj, datetime.time):
+        return msgpack.ExtType(_EXT_TIME, obj.isoformat().encode("ascii"))
+    raise TypeError(f"Cannot serialize {type(obj).__name__!r} with msgpack")
+
+
+def _msgpack_ext_hook(code: int, data: bytes) -> Any:
+    decoder = _EXT_DECODERS.get(code)
+    return decoder(data) if decoder is not None else msgpack.ExtType(code, data)
+
+
+def dumps_payload(payload: Any) -> bytes:
+    """Serialize a cache payload, preferring msgpack and falling back to pickle.
+    Large encodings are LZ4-compressed; repeated column names compress very well.
+    """
+    try:
+        tag, body = _MSGPACK_TAG, msgpack.packb(payload, use_bin_type=True, datetime=True, default=_msgpack_default)
+    except (TypeError, ValueError, OverflowError):
+        tag, body = _PICKLE_TAG, pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(body) > _COMPRESS_THRESHOLD:
+        return _COMPRESSED_TAGS[tag] + lz4.block.compress(body)
+    return tag + body
+
+
+def loads_payload(blob: bytes) -> Any:
+    """Deserialize a blob written by `dumps_payload` (or an untagged legacy pickle)."""
+    tag, body = blob[:1], memoryview(blob)[1:]
+    if tag in _DECOMPRESSED_TAGS:
+        tag, body = _DECOMPRESSED_TAGS[tag], lz4.block.decompress(body)
+    if tag == _MSGPACK_TAG:
+        return msgpack.unpackb(body, raw=False, timestamp=3, ext_hook=_msgpack_ext_hook)
+    if tag == _PICKLE_TAG:
+        return pickle.loads(body)
+    # Entries written before the format tag existed are plain pickles
+    return pickle.loads(blob)
+
+
+class _CachedState:
+    """Slot storage for the cache state, keeping it out of the session's instance `__dict__`."""
+
+    __slots__ = (
+        "_redis",
+        "_cache_prefix",
+        "_ttl",
+        "_large_payload_threshold",
+        "_last_from_cache",
+        "_local_cache",
+        "_pending_writes",
+        "_deferred_writes",
+    )
+
+
+class CachedAsyncSession(_CachedState, AsyncSession):
+    """
+    AsyncSession subclass that transparently caches SELECT queries in Redis using msgpack.
     """
 
     def __init__(
@@ -34,119 +385,295 @@ class CachedAsyncSession(AsyncSession):
         redis_client: aioredis.Redis,
         cache_prefix: str = "sqlcache",
         default_ttl: int = 60,
+        max_local_entries: int = 1024,
+        large_payload_threshold: int = 16 * 1024,
         **kwargs,
     ):
         super().__init__(*args, **kwargs)
         self._redis = redis_client
         self._cache_prefix = cache_prefix
         self._ttl = default_ttl
+        # Blobs larger than this many bytes are (de)serialized in a worker thread
+        self._large_payload_threshold = large_payload_threshold
         # Track whether the last execute returned from cache (True), DB (False), or unknown (None)
         self._last_from_cache = None
-        # Simple in-memory fallback cache: {key: (payload, expiry_ts)}
-        self._local_cache = {}
+        # Bounded in-memory fallback cache (LRU eviction, per-entry TTL)
+        self._local_cache = TTLCache(maxsize=max_local_entries, ttl=self._ttl)
+        # In-flight fire-and-forget Redis writes (kept referenced until done)
+        self._pending_writes: set[asyncio.Task] = set()
+        # Writes collected inside a `pipeline()` block; None when writes go out immediately
+        self._deferred_writes: Optional[list[tuple[bytes, bytes, Iterable[str]]]] = None
 
-    async def execute(self, statement: Executable, params: Optional[dict] = None, **kwargs: Any):
+    @staticmethod
+    def _is_select(statement: Executable) -> bool:
+        # select(Entity).from_statement(...) is as cacheable as the statement it wraps
+        if isinstance(statement, FromStatement):
+            statement = statement.element
+        # Select, CompoundSelect and TextualSelect flag themselves; only raw text needs a peek
+        if statement.is_select:
+            return True
+        return isinstance(statement, TextClause) and _leading_keyword(statement.text) == "select"
+
+    async def execute(
+        self, statement: Executable, params: Optional[dict] = None, *, no_cache: bool = False, **kwargs: Any
+    ):
         params = params or {}
 
-        # Only cache SELECT statements
-        is_select = isinstance(statement, Select)
-        if not is_select:
-            with contextlib.suppress(Exception):
-                txt = str(statement).strip().lower()
-                if txt.startswith("select"):
-                    is_select = True
-        if not is_select:
-            # Not a SELECT -> bypass cache
+        # Only cache SELECT statements that haven't opted out
+        if no_cache or _no_cache_requested(statement, kwargs) or not self._is_select(statement):
+            # Not cacheable -> bypass cache
             return await super().execute(statement, params=params, **kwargs)
 
         # Build cache key
+        statement, entity = _rewrite_entity_select(statement)
         cache_key = make_cache_key(statement, params, prefix=self._cache_prefix)
 
         # 1) Try cache (Redis first; then local fallback). Don't fail if cache is down.
         try:
             cached = await self._redis.get(cache_key)
-        except Exception:
+        except aioredis.RedisError:
             cached = None
+        found, payload = await self._lookup(cache_key, cached)
+        if found:
+            return payload
+
+        # 2) Otherwise hit DB
+        return await self._execute_and_cache(statement, params, cache_key, entity, **kwargs)
+
+    async def execute_many(self, statements: list[Executable], params_list: Optional[list[Optional[dict]]] = None):
+        """Execute several statements, fetching all cached SELECT results with a single MGET.
+        Results are returned in the same order as `statements`.
+        """
+        params_list = [p or {} for p in params_list] if params_list is not None else [{} for _ in statements]
+        statements = list(statements)
+        entities = [None] * len(statements)
+        cache_keys = [None] * len(statements)
+        for i, (stmt, params) in enumerate(zip(statements, params_list)):
+            if self._is_select(stmt) and not _no_cache_requested(stmt, {}):
+                statements[i], entities[i] = _rewrite_entity_select(stmt)
+                cache_keys[i] = make_cache_key(statements[i], params, prefix=self._cache_prefix)
+
+        cached_blobs = [None] * len(statements)
+        if lookup_keys := [key for key in cache_keys if key is not None]:
+            try:
+                blobs = iter(await self._redis.mget(lookup_keys))
+                cached_blobs = [next(blobs) if key is not None else None for key in cache_keys]
+            except aioredis.RedisError:
+                pass
+
+        # Misses run one after another: a session can't execute statements concurrently.
+        # Their cache writes are sent together as a single pipeline.
+        results = []
+        async with self.pipeline():
+            for stmt, params, entity, cache_key, cached in zip(
+                statements, params_list, entities, cache_keys, cached_blobs
+            ):
+                if cache_key is None:
+                    results.append(await super().execute(stmt, params=params))
+                    continue
+                found, payload = await self._lookup(cache_key, cached)
+                if not found:
+                    payload = await self._execute_and_cache(stmt, params, cache_key, entity)
+                results.append(payload)
+        return results
+
+    @contextlib.asynccontextmanager
+    async def pipeline(self):
+        """Defer cache writes made inside the block and send them as one Redis pipeline on exit."""
+        if self._deferred_writes is not None:
+            # Nested block: the outermost one sends the writes
+            yield self
+            return
+        self._deferred_writes = []
+        _deferring_sessions.add(self)
+        try:
+            yield self
+        finally:
+            _deferring_sessions.discard(self)
+            writes, self._deferred_writes = self._deferred_writes, None
+            if writes:
+                self._spawn_write(writes)
+
+    def _drop_deferred_writes(self, table: Optional[str]) -> None:
+        """Forget deferred writes made stale by a write to `table` (None: any table).
+        Mirrors `invalidate_tables`, which also clears untagged queries.
+        """
+        if table is None:
+            self._deferred_writes.clear()
+        else:
+            stale = {table, _UNTAGGED}
+            self._deferred_writes[:] = [write for write in self._deferred_writes if stale.isdisjoint(write[2])]
+
+    async def _lookup(self, cache_key: bytes, cached: Optional[bytes]) -> tuple[bool, Any]:
+        """Resolve a cache hit from a Redis blob, falling back to the local cache."""
         if cached:
             print("🔹 Returning from cache")
             self._last_from_cache = True
-            return pickle.loads(cached)
-        # Local fallback
-        entry = self._local_cache.get(cache_key)
-        if entry is not None:
-            payload, expiry = entry
-            if expiry > time.time():
-                print("🔹 Returning from cache (local)")
-                self._last_from_cache = True
-                return payload
-            else:
-                # expired
-                self._local_cache.pop(cache_key, None)
+            return True, await self._decode(cached)
+        # Local fallback (expired entries are dropped by the TTLCache itself)
+        payload = self._local_cache.get(cache_key, _MISSING)
+        if payload is not _MISSING:
+            print("🔹 Returning from cache (local)")
+            self._last_from_cache = True
+            return True, payload
+        return False, None
 
-        # 2) Otherwise hit DB
+    async def _execute_and_cache(
+        self, statement: Executable, params: dict, cache_key: bytes, entity: Optional[dict] = None, **kwargs: Any
+    ):
+        """Run a cacheable SELECT and cache its payload. `entity` is the description returned
+        by `_rewrite_entity_select` when `statement` is a rewritten single-entity select.
+        """
         print("⚡ Hitting the database")
         result = await super().execute(statement, params=params, **kwargs)
         self._last_from_cache = False
 
         # Materialize a portable payload (list of dicts or primitives)
-        payload = []
-        try:
-            if scalars_list := result.scalars().all():
-                first = scalars_list[0]
-                if hasattr(first, "__mapper__"):
-                    # ORM models -> serialize columns
-                    try:
-                        payload = [
-                            {attr.key: getattr(obj, attr.key) for attr in sa_inspect(obj).mapper.column_attrs}
-                            for obj in scalars_list
-                        ]
-                    except Exception:
-                        payload = []
-                else:
-                    # Primitives (ints, strs, etc.)
-                    payload = list(scalars_list)
-            else:
-                # No scalars; try mappings (e.g., select of specific columns)
-                try:
-                    rows = result.mappings().all()
-                    payload = [dict(r) for r in rows]
-                except Exception:
-                    payload = []
-        except Exception:
-            try:
-                rows = result.mappings().all()
-                payload = [dict(r) for r in rows]
-            except Exception:
-                payload = []
-
-        # 3) Store in Redis
-        with contextlib.suppress(Exception):
-            await self._redis.set(cache_key, pickle.dumps(payload), ex=self._ttl)
+        if entity is not None:
+            # ORM entity selected as its columns -> one dict of column values per row
+            payload = [dict(zip(_column_keys(entity["type"]), row)) for row in result]
+        elif (entity := _single_entity(statement)) is not None:
+            # e.g. from_statement(), which can't be rewritten -> read the loaded instances
+            keys = _column_keys(entity["type"])
+            payload = [{key: getattr(obj, key) for key in keys} for obj in result.scalars()]
+        elif len(result.keys()) == 1:
+            # Single column -> primitives (ints, strs, etc.)
+            payload = result.scalars().all()
+        elif positions := _entity_positions(statement):
+            # Several items including ORM entities, e.g. select(Parent, Child) -> one dict per
+            # row, each entity in it a dict of its column values (None for outer-join misses)
+            names = list(result.keys())
+            payload = []
+            for row in result:
+                values = list(row)
+                for index, keys in positions:
+                    obj = values[index]
+                    if obj is not None:
+                        values[index] = {key: getattr(obj, key) for key in keys}
+                payload.append(dict(zip(names, values)))
+        else:
+            # Several columns -> one dict per row
+            payload = [dict(row) for row in result.mappings()]
+
+        # 3) Store in Redis without waiting for the round-trip, tagged by source table.
+        # Encoded now so later changes the caller makes to `payload` can't reach Redis.
+        blob = await self._encode(payload)
+        self._schedule_write(cache_key, blob, statement_tables(statement) or {_UNTAGGED})
         # Always set local fallback
-        self._local_cache[cache_key] = (payload, time.time() + float(self._ttl))
+        self._local_cache[cache_key] = payload
 
         return payload
 
+    async def _decode(self, blob: bytes) -> Any:
+        # Keep large decodes off the event loop so they don't stall other coroutines
+        if len(blob) < self._large_payload_threshold:
+            return loads_payload(blob)
+        return await asyncio.to_thread(loads_payload, blob)
+
+    async def _encode(self, payload: Any) -> bytes:
+        # The encoded size isn't known up front, so estimate it from the row count
+        if len(payload) * _ESTIMATED_ROW_BYTES < self._large_payload_threshold:
+            return dumps_payload(payload)
+        return await asyncio.to_thread(dumps_payload, payload)
+
+    def _schedule_write(self, cache_key: bytes, blob: bytes, tables: Iterable[str]) -> None:
+        if self._deferred_writes is not None:
+            self._deferred_writes.append((cache_key, blob, tables))
+        else:
+            self._spawn_write([(cache_key, blob, tables)])
+
+    def _spawn_write(self, writes: list[tuple[bytes, bytes, Iterable[str]]]) -> None:
+        task = asyncio.create_task(self._write(writes))
+        self._pending_writes.add(task)
+        task.add_done_callback(self._on_write_done)
+
+    async def _write(self, writes: list[tuple[bytes, bytes, Iterable[str]]]) -> None:
+        expire_options = await _expire_options_supported(self._redis, self._cache_prefix)
+        now = time.time()
+        pipe = self._redis.pipeline(transaction=False)
+        for cache_key, blob, tables in writes:
+            pipe.set(cache_key, blob, ex=self._ttl)
+            for table in tables:
+                tag_key = _tag_key(self._cache_prefix, table)
+                pipe.zadd(tag_key, {cache_key: now + self._ttl})
+                # Prune members whose cache entry has already expired, so a tag that keeps
+                # getting written (and so never expires itself) doesn't grow without bound
+                pipe.zremrangebyscore(tag_key, "-inf", now)
+                if expire_options:
+                    # Only ever extend the tag set's TTL so it outlives every key it tracks,
+                    # even when sessions with different TTLs share a prefix
+                    pipe.expire(tag_key, self._ttl, nx=True)
+                    pipe.expire(tag_key, self._ttl, gt=True)
+                else:
+                    # Redis < 7: the last write sets the TTL, so sessions sharing a prefix
+                    # should share a TTL too (see README)
+                    pipe.expire(tag_key, self._ttl)
+        await pipe.execute()
+
+    def _on_write_done(self, task: asyncio.Task) -> None:
+        self._pending_writes.discard(task)
+        if not task.cancelled() and (exc := task.exception()) is not None:
+            logger.warning("Cache write failed: %r", exc)
+
+    async def flush_cache_writes(self):
+        """Wait for all in-flight cache writes to finish."""
+        if self._pending_writes:
+            await asyncio.gather(*self._pending_writes, return_exceptions=True)
+
+    async def close(self):
+        await self.flush_cache_writes()
+        await super().close()
+
     async def clear_cache(self):
         """Clear all cached queries (prefix-based)."""
-        keys = await self._redis.keys(f"{self._cache_prefix}:*")
-        if keys:
-            await self._redis.delete(*keys)
+        await clear_prefix(self._redis, self._cache_prefix)
+
+    async def invalidate_tables(self, *tables: str):
+        """Clear cached queries that read from any of the given tables."""
+        await invalidate_tables(self._redis, tables, self._cache_prefix)
+
+
+# Sessions currently inside a `pipeline()` block, so invalidation can drop their
+# deferred writes before they reach Redis with pre-write results
+_deferring_sessions: "weakref.WeakSet[CachedAsyncSession]" = weakref.WeakSet()
+
+# In-flight invalidation tasks (kept referenced until done)
+_invalidation_tasks: set[asyncio.Task] = set()
+
+
+def _on_invalidation_done(task: asyncio.Task) -> None:
+    _invalidation_tasks.discard(task)
+    if not task.cancelled() and (exc := task.exception()) is not None:
+        logger.warning("Cache invalidation failed: %r", exc)
 
 
 def register_simple_invalidation(engine, redis_client: aioredis.Redis, cache_prefix: str = "sqlcache"):
     """
-    Simple invalidation: clears all cache on insert/update/delete.
+    Simple invalidation: on insert/update/delete, clears the cached queries tagged with the
+    written table. Raw-text DML whose table is unknown clears the whole cache.
     """
-    async def _clear_cache():
-        keys = await redis_client.keys(f"{cache_prefix}:*")
-        if keys:
-            await redis_client.delete(*keys)
-
     @event.listens_for(engine.sync_engine, "after_execute")
     def _after_execute(conn, clauseelement, multiparams, params, result):
-        with contextlib.suppress(Exception):
-            txt = str(clauseelement).strip().lower()
-            if txt.startswith(("insert", "update", "delete")):
-                loop = asyncio.get_running_loop()
-                loop.create_task(_clear_cache())
+        if getattr(clauseelement, "is_dml", False):
+            # None for DML against e.g. an alias; falls back to clearing everything
+            table = getattr(clauseelement.table, "fullname", None)
+        else:
+            # Raw DML: a TextClause, or a plain string from exec_driver_sql
+            sql = clauseelement.text if isinstance(clauseelement, TextClause) else clauseelement
+            if not isinstance(sql, str) or _leading_keyword(sql) not in ("insert", "update", "delete"):
+                return
+            table = None
+        for session in list(_deferring_sessions):
+            if session._cache_prefix == cache_prefix:
+                session._drop_deferred_writes(table)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Not running under an event loop (plain sync engine use); nothing to schedule on
+            return
+        if table is not None:
+            task = loop.create_task(invalidate_tables(redis_client, {table}, cache_prefix))
+        else:
+            task = loop.create_task(clear_prefix(redis_client, cache_prefix))
+        _invalidation_tasks.add(task)
+        task.add_done_callback(_on_invalidation_done)
@@ -0,0 +1,43 @@
+# tests/helpers.py
+import asyncio
+import contextlib
+
+import fakeredis
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import mycachelib
+from mycachelib import CachedAsyncSession, register_simple_invalidation
+from models import Base, User
+
+
+@contextlib.asynccontextmanager
+async def cache_env(*metadatas, redis_version=7, **session_kwargs):
+    """In-memory SQLite + fakeredis with invalidation registered and two seeded users.
+    Yields (session factory, redis client); extra metadatas get their tables created and
+    `redis_version` sets the Redis version fakeredis emulates.
+    """
+    engine = create_async_engine("sqlite+aiosqlite://")
+    redis_client = fakeredis.FakeAsyncRedis(version=redis_version)
+    async with engine.begin() as conn:
+        for metadata in (Base.metadata, *metadatas):
+            await conn.run_sync(metadata.create_all)
+    register_simple_invalidation(engine, redis_client)
+    session_kwargs.setdefault("default_ttl", 120)
+    SessionLocal = sessionmaker(
+        engine, expire_on_commit=False, class_=CachedAsyncSession, redis_client=redis_client, **session_kwargs
+    )
+    async with SessionLocal() as session:
+        session.add_all([User(id=1, username="a", email="a@x"), User(id=2, username="b", email="b@x")])
+        await session.commit()
+    try:
+        yield SessionLocal, redis_client
+    finally:
+        await engine.dispose()
+
+
+async def settle(session):
+    """Wait for the session's background cache writes and any pending invalidations."""
+    await session.flush_cache_writes()
+    if mycachelib._invalidation_tasks:
+        await asyncio.gather(*mycachelib._invalidation_tasks, return_exceptions=True)
@@ -0,0 +1,24 @@
+# tests/test_cache_key.py
+from sqlalchemy import select, text
+
+from models import User
+from mycachelib import make_cache_key
+
+
+def test_literal_binds_give_distinct_keys():
+    key_2 = make_cache_key(select(User.username).where(User.id == 2), {})
+    key_3 = make_cache_key(select(User.username).where(User.id == 3), {})
+    assert key_2 != key_3
+    # Rebuilt but equivalent statements still share a key
+    assert key_2 == make_cache_key(select(User.username).where(User.id == 2), {})
+
+
+def test_param_order_does_not_change_key():
+    stmt = text("SELECT * FROM users WHERE id = :id AND username = :name")
+    assert make_cache_key(stmt, {"id": 1, "name": "a"}) == make_cache_key(stmt, {"name": "a", "id": 1})
+
+
+def test_param_types_give_distinct_keys():
+    stmt = text("SELECT * FROM users WHERE id = :id")
+    keys = {make_cache_key(stmt, {"id": value}) for value in (1, "1", True, 1.0, None)}
+    assert len(keys) == 5
@@ -0,0 +1,99 @@
+# tests/test_invalidation.py
+import asyncio
+import time
+
+from sqlalchemy import select, update
+
+from models import User
+from mycachelib import clear_prefix, invalidate_tables, make_cache_key
+from tests.helpers import cache_env, settle
+
+
+def test_dml_invalidates_tagged_queries():
+    async def scenario():
+        async with cache_env() as (SessionLocal, _):
+            stmt = select(User.username).where(User.id == 1)
+            async with SessionLocal() as session:
+                assert await session.execute(stmt) == ["a"]
+                await settle(session)
+                await session.execute(update(User).where(User.id == 1).values(username="z"))
+                await session.commit()
+                await settle(session)
+
+            async with SessionLocal() as session:
+                assert await session.execute(stmt) == ["z"]
+                assert session._last_from_cache is False
+
+    asyncio.run(scenario())
+
+
+def test_short_ttl_write_does_not_shorten_tag_set_ttl():
+    async def scenario():
+        async with cache_env(default_ttl=600) as (SessionLocal, redis_client):
+            async with SessionLocal() as session:
+                await session.execute(select(User.id))
+                await settle(session)
+            async with SessionLocal(default_ttl=60) as session:
+                await session.execute(select(User.email))
+                await settle(session)
+            assert await redis_client.ttl("sqlcache:tag:users") > 60
+
+    asyncio.run(scenario())
+
+
+def test_writes_prune_expired_tag_members():
+    async def scenario():
+        async with cache_env() as (SessionLocal, redis_client):
+            await redis_client.zadd("sqlcache:tag:users", {b"expired": time.time() - 1})
+            async with SessionLocal() as session:
+                await session.execute(select(User.id))
+                await settle(session)
+            members = await redis_client.zrange("sqlcache:tag:users", 0, -1)
+            assert len(members) == 1 and b"expired" not in members
+
+    asyncio.run(scenario())
+
+
+def test_invalidation_unlinks_large_tags_in_batches():
+    async def scenario():
+        async with cache_env() as (_, redis_client):
+            keys = [f"k{i}".encode() for i in range(1200)]
+            await redis_client.mset({key: b"x" for key in keys})
+            await redis_client.zadd("sqlcache:tag:users", {key: time.time() + 60 for key in keys})
+            await invalidate_tables(redis_client, ["users"])
+            assert await redis_client.exists(*keys) == 0
+            assert await redis_client.zcard("sqlcache:tag:users") == 0
+
+    asyncio.run(scenario())
+
+
+def test_tag_sets_get_a_ttl_before_redis_7():
+    async def scenario():
+        async with cache_env(redis_version=6) as (SessionLocal, redis_client):
+            stmt = select(User.id)
+            async with SessionLocal() as session:
+                await session.execute(stmt)
+                await settle(session)
+            assert 0 < await redis_client.ttl("sqlcache:tag:users") <= 120
+
+            async with SessionLocal() as session:
+                assert await session.execute(stmt) == [1, 2]
+                assert session._last_from_cache is True
+
+    asyncio.run(scenario())
+
+
+def test_clear_prefix_leaves_other_prefixes_alone():
+    async def scenario():
+        async with cache_env() as (SessionLocal, redis_client):
+            stmt = select(User.id)
+            for prefix in ("sqlcache", "other"):
+                async with SessionLocal(cache_prefix=prefix) as session:
+                    await session.execute(stmt)
+                    await settle(session)
+
+            await clear_prefix(redis_client, "sqlcache")
+            assert not await redis_client.exists(make_cache_key(stmt, {}, prefix="sqlcache"), "sqlcache:tag:users")
+            assert await redis_client.exists(make_cache_key(stmt, {}, prefix="other"), "other:tag:users") == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,83 @@
+# tests/test_serialization.py
+import asyncio
+import datetime
+import uuid
+from decimal import Decimal
+
+from sqlalchemy import Date, DateTime, Integer, Numeric, select
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+from mycachelib import dumps_payload, loads_payload
+from tests.helpers import cache_env, settle
+
+
+class _ItemBase(DeclarativeBase):
+    pass
+
+
+class Item(_ItemBase):
+    __tablename__ = "items"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    price: Mapped[Decimal] = mapped_column(Numeric(10, 2))
+    created_at: Mapped[datetime.datetime] = mapped_column(DateTime)
+    due: Mapped[datetime.date] = mapped_column(Date)
+
+
+def test_extension_types_round_trip():
+    payload = [
+        {
+            "price": Decimal("1.50"),
+            "uid": uuid.uuid4(),
+            "naive": datetime.datetime(2020, 1, 1),
+            "day": datetime.date(2020, 1, 2),
+            "at": datetime.time(1, 2, 3),
+        }
+    ]
+    blob = dumps_payload(payload)
+    assert blob[:1] == b"\x01"
+    assert loads_payload(blob) == payload
+
+
+def test_large_payloads_are_lz4_compressed():
+    payload = [{"id": i, "username": f"user{i}", "email": f"user{i}@example.com"} for i in range(100)]
+    blob = dumps_payload(payload)
+    assert blob[:1] == b"\x02"
+    assert len(blob) < len(dumps_payload(payload[:1])) * 100
+    assert loads_payload(blob) == payload
+
+    # The pickle fallback is compressed too
+    unpackable = [{"value": complex(i, 1)} for i in range(100)]
+    blob = dumps_payload(unpackable)
+    assert blob[:1] == b"\x03"
+    assert loads_payload(blob) == unpackable
+
+
+def test_redis_hit_matches_db_miss():
+    async def scenario():
+        async with cache_env(_ItemBase.metadata) as (SessionLocal, _):
+            async with SessionLocal() as session:
+                session.add(
+                    Item(
+                        id=1,
+                        price=Decimal("1.50"),
+                        created_at=datetime.datetime(2020, 1, 1),
+                        due=datetime.date(2020, 1, 2),
+                    )
+                )
+                await session.commit()
+                miss = await session.execute(select(Item))
+                assert session._last_from_cache is False
+                await settle(session)
+
+            # A fresh session has an empty local cache, so this is answered by Redis
+            async with SessionLocal() as session:
+                hit = await session.execute(select(Item))
+                assert session._last_from_cache is True
+
+            assert hit == miss
+            assert [{k: type(v) for k, v in row.items()} for row in hit] == [
+                {k: type(v) for k, v in row.items()} for row in miss
+            ]
+
+    asyncio.run(scenario())
@@ -0,0 +1,136 @@
+# tests/test_session.py
+import asyncio
+
+from sqlalchemy import select, text, update
+from sqlalchemy.orm import aliased, load_only
+
+from models import User
+from mycachelib import make_cache_key
+from tests.helpers import cache_env, settle
+
+
+def test_caller_mutation_does_not_reach_redis():
+    async def scenario():
+        async with cache_env() as (SessionLocal, _):
+            stmt = select(User.username).order_by(User.id)
+            async with SessionLocal() as session:
+                payload = await session.execute(stmt)
+                payload.append("INJECTED")
+                await settle(session)
+
+            async with SessionLocal() as session:
+                assert await session.execute(stmt) == ["a", "b"]
+                assert session._last_from_cache is True
+
+    asyncio.run(scenario())
+
+
+def test_pipeline_drops_writes_invalidated_inside_block():
+    async def scenario():
+        async with cache_env() as (SessionLocal, _):
+            stmt = select(User.username).where(User.id == 1)
+            async with SessionLocal() as session:
+                async with session.pipeline():
+                    assert await session.execute(stmt) == ["a"]
+                    await session.execute(update(User).where(User.id == 1).values(username="z"))
+                    await session.commit()
+                await settle(session)
+
+            async with SessionLocal() as session:
+                assert await session.execute(stmt) == ["z"]
+
+    asyncio.run(scenario())
+
+
+def test_from_statement_is_cached():
+    async def scenario():
+        async with cache_env() as (SessionLocal, _):
+            stmt = select(User).from_statement(text("select * from users where id = 1"))
+            async with SessionLocal() as session:
+                miss = await session.execute(stmt)
+                await settle(session)
+
+            async with SessionLocal() as session:
+                assert await session.execute(stmt) == miss
+                assert session._last_from_cache is True
+            assert miss == [{"id": 1, "username": "a", "email": "a@x", "is_active": True}]
+
+    asyncio.run(scenario())
+
+
+def test_execute_many_honours_no_cache():
+    async def scenario():
+        async with cache_env() as (SessionLocal, _):
+            async with SessionLocal() as session:
+                cached, bypassed = await session.execute_many(
+                    [
+                        select(User.id).order_by(User.id),
+                        select(User.username).order_by(User.id).execution_options(no_cache=True),
+                    ]
+                )
+                assert cached == [1, 2]
+                assert bypassed.scalars().all() == ["a", "b"]
+
+    asyncio.run(scenario())
+
+
+def test_multi_entity_rows_are_cached_as_column_dicts():
+    async def scenario():
+        async with cache_env() as (SessionLocal, redis_client):
+            other = aliased(User, name="other")
+            stmt = select(User, other.username, other).outerjoin(other, other.id == User.id + 1).order_by(User.id)
+            a = {"id": 1, "username": "a", "email": "a@x", "is_active": True}
+            b = {"id": 2, "username": "b", "email": "b@x", "is_active": True}
+            expected = [{"User": a, "username": "b", "other": b}, {"User": b, "username": None, "other": None}]
+            async with SessionLocal() as session:
+                assert await session.execute(stmt) == expected
+                await settle(session)
+
+            # Plain msgpack, not a pickle of live ORM instances
+            assert (await redis_client.get(make_cache_key(stmt, {})))[:1] == b"\x01"
+            async with SessionLocal() as session:
+                assert await session.execute(stmt) == expected
+                assert session._last_from_cache is True
+
+    asyncio.run(scenario())
+
+
+_USER_ROWS = [
+    {"id": 1, "username": "a", "email": "a@x", "is_active": True},
+    {"id": 2, "username": "b", "email": "b@x", "is_active": True},
+]
+
+
+def test_loader_options_do_not_share_keys_with_column_selects():
+    async def scenario():
+        async with cache_env() as (SessionLocal, _):
+            async with SessionLocal() as session:
+                assert await session.execute(select(User).options(load_only(User.id)).order_by(User.id)) == _USER_ROWS
+                await settle(session)
+            # load_only() makes the entity select compile like this one; it must not get its rows
+            async with SessionLocal() as session:
+                assert await session.execute(select(User.id).order_by(User.id)) == [1, 2]
+                assert session._last_from_cache is False
+
+    asyncio.run(scenario())
+
+
+def test_entity_selects_are_rewritten_and_cached():
+    async def scenario():
+        async with cache_env() as (SessionLocal, _):
+            other = aliased(User, name="other")
+            statements = [
+                select(User).order_by(User.id),
+                select(other).where(other.id > 0).order_by(other.id),
+                select(User).from_statement(text("SELECT * FROM users ORDER BY id")),
+            ]
+            async with SessionLocal() as session:
+                for stmt in statements:
+                    assert await session.execute(stmt) == _USER_ROWS
+                    assert session._last_from_cache is False
+                await settle(session)
+            async with SessionLocal() as session:
+                assert await session.execute_many(statements) == [_USER_ROWS] * 3
+                assert session._last_from_cache is True
+
+    asyncio.run(scenario())